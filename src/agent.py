@@ -18,10 +18,12 @@ Last tested: Working Swedish greeting without cutoff - 2025
 """
 
 import asyncio
+import gzip
 import logging
 import os
 import time
 import aiohttp
+import orjson
 from datetime import datetime
 from livekit import agents, api
 from livekit.agents import JobContext, WorkerOptions, cli, get_job_context
@@ -37,35 +39,77 @@ load_dotenv()
 
 logger = logging.getLogger("voice-agent")
 
+# Swedish prompt defaults, used when not overridden from the environment
+_DEFAULT_SYSTEM_PROMPT = (
+    "Du är en hjälpsam röstassistent som ALLTID svarar på svenska. "
+    "Var konversationell och vänlig. Håll svaren korta och naturliga för talade konversationer. "
+    "Du pratar med någon över telefon, så var tydlig och engagerande. "
+    "Svara ALLTID på svenska, oavsett vilket språk användaren pratar."
+)
+_DEFAULT_GREETING_MESSAGE = "Hej och välkommen! Jag är Elsa, din AI-assistent. Vad kan jag hjälpa dig med idag?"
+_FAREWELL_INSTRUCTIONS = "Säg adjö på svenska: 'Tack för samtalet! Ha en bra dag. Vi hörs!' och avsluta samtalet."
+
+# Runtime configuration, resolved once at import (after .env files are loaded)
+_VOICE_NAME = os.getenv("VOICE_NAME", "marin")
+_WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+_WEBHOOK_GZIP = os.getenv("WEBHOOK_GZIP", "false").lower() in ("1", "true", "yes")
+_SYSTEM_PROMPT = os.getenv("AGENT_SYSTEM_PROMPT", _DEFAULT_SYSTEM_PROMPT)
+_GREETING_MESSAGE = os.getenv("AGENT_GREETING_MESSAGE", _DEFAULT_GREETING_MESSAGE)
+_GREETING_INSTRUCTIONS = f"Säg hälsningen på svenska: '{_GREETING_MESSAGE}' och vänta på svar."
+
+# GPT-Realtime (2025 model) settings with Swedish transcription, built once and
+# shared by every session; none of these values vary between calls
+_REALTIME_CFG = dict(
+    model="gpt-realtime",  # Correct 2025 GPT-Realtime model
+    voice=_VOICE_NAME,
+    modalities=["audio", "text"],
+    temperature=0.7,
+    input_audio_transcription=InputAudioTranscription(
+        model="whisper-1",
+        language="sv",  # Swedish language
+        prompt="Svenska konversation med AI-assistent Elsa"
+    )
+)
+
 
 class ConversationTracker:
     def __init__(self):
-        self.conversation_data = []
+        # Parallel lists keep the per-turn hot path to plain appends;
+        # item dicts are only built when the webhook payload is serialized
+        self.roles = []
+        self.contents = []
+        self.timestamps = []
+        # Wall-clock start for the payload; duration is measured on the monotonic clock
         self.start_time = time.time()
+        self._start_ns = time.monotonic_ns()
         self.call_id = None
 
     def add_item(self, role, content, timestamp=None):
-        self.conversation_data.append({
-            "role": role,
-            "content": content,
-            "timestamp": timestamp or time.time(),
-            "datetime": datetime.now().isoformat()
-        })
+        self.roles.append(role)
+        self.contents.append(content)
+        self.timestamps.append(timestamp or time.time())
+
+    def get_conversation_data(self):
+        """Materialize tracked items as dicts for the webhook payload"""
+        return [
+            {
+                "role": role,
+                "content": content,
+                "timestamp": ts,
+                # orjson serializes datetime natively in isoformat() form
+                "datetime": datetime.fromtimestamp(ts)
+            }
+            for role, content, ts in zip(self.roles, self.contents, self.timestamps)
+        ]
 
     def get_duration(self):
-        return time.time() - self.start_time
+        return (time.monotonic_ns() - self._start_ns) / 1e9
 
 
 class VoiceAssistant(Agent):
     def __init__(self, tools=None):
-        # Load system prompt from environment with Swedish fallback
-        system_prompt = os.getenv("AGENT_SYSTEM_PROMPT",
-            "Du är en hjälpsam röstassistent som ALLTID svarar på svenska. "
-            "Var konversationell och vänlig. Håll svaren korta och naturliga för talade konversationer. "
-            "Du pratar med någon över telefon, så var tydlig och engagerande. "
-            "Svara ALLTID på svenska, oavsett vilket språk användaren pratar."
-        )
-        super().__init__(instructions=system_prompt, tools=tools or [])
+        # System prompt from environment with Swedish fallback
+        super().__init__(instructions=_SYSTEM_PROMPT, tools=tools or [])
         self.session_ref = None
         self.ctx_ref = None
 
@@ -80,7 +124,7 @@ class VoiceAssistant(Agent):
             if self.session_ref:
                 logger.info("Generating farewell message...")
                 speech_handle = await self.session_ref.generate_reply(
-                    instructions="Säg adjö på svenska: 'Tack för samtalet! Ha en bra dag. Vi hörs!' och avsluta samtalet."
+                    instructions=_FAREWELL_INSTRUCTIONS
                 )
 
                 # CRITICAL: Wait for speech to complete with timeout
@@ -91,7 +135,7 @@ class VoiceAssistant(Agent):
                 await asyncio.sleep(1.0)
 
             # Delete room for complete call termination (required for telephony)
-            ctx = get_job_context()
+            ctx = self.ctx_ref
             if ctx:
                 logger.info(f"Deleting room: {ctx.room.name}")
                 await ctx.api.room.delete_room(
@@ -103,7 +147,7 @@ class VoiceAssistant(Agent):
 
         except asyncio.TimeoutError:
             logger.warning("Farewell message timed out, force terminating")
-            ctx = get_job_context()
+            ctx = self.ctx_ref
             if ctx:
                 await ctx.api.room.delete_room(
                     api.DeleteRoomRequest(room=ctx.room.name)
@@ -112,7 +156,7 @@ class VoiceAssistant(Agent):
             logger.error(f"Error during call termination: {e}")
             # Ensure call still ends even with errors
             try:
-                ctx = get_job_context()
+                ctx = self.ctx_ref
                 if ctx:
                     await ctx.api.room.delete_room(
                         api.DeleteRoomRequest(room=ctx.room.name)
@@ -137,25 +181,31 @@ async def end_call():
 
 async def send_webhook(tracker: ConversationTracker):
     """Send conversation data to webhook after call completion"""
-    webhook_url = os.getenv("WEBHOOK_URL")
-    if not webhook_url:
-        logger.info("No webhook URL configured, skipping webhook")
-        return
-
+    # duration_seconds is monotonic; end_time stays on the wall clock like the item timestamps
+    duration = tracker.get_duration()
+    end_time = time.time()
     payload = {
         "call_id": tracker.call_id,
-        "conversation": tracker.conversation_data,
-        "duration_seconds": tracker.get_duration(),
-        "timestamp": int(time.time()),
+        "conversation": tracker.get_conversation_data(),
+        "duration_seconds": duration,
+        "timestamp": int(end_time),
         "start_time": tracker.start_time,
-        "end_time": time.time()
+        "end_time": end_time
     }
 
     try:
+        body = orjson.dumps(payload)
+        headers = {"Content-Type": "application/json"}
+        if _WEBHOOK_GZIP:
+            # Level 1 already shrinks long transcripts severalfold at negligible CPU cost
+            body = gzip.compress(body, compresslevel=1)
+            headers["Content-Encoding"] = "gzip"
+
         async with aiohttp.ClientSession() as session:
             async with session.post(
-                webhook_url,
-                json=payload,
+                _WEBHOOK_URL,
+                data=body,
+                headers=headers,
                 timeout=aiohttp.ClientTimeout(total=30)
             ) as response:
                 if response.status == 200:
@@ -176,46 +226,39 @@ async def entrypoint(ctx: JobContext):
 
     logger.info(f"Starting call tracking for room: {tracker.call_id}")
 
-    # Get configuration from environment
-    voice_name = os.getenv("VOICE_NAME", "marin")
-
     # Create AgentSession with GPT-Realtime (2025 model) and Swedish configuration
     session = AgentSession(
-        llm=openai.realtime.RealtimeModel(
-            model="gpt-realtime",  # Correct 2025 GPT-Realtime model
-            voice=voice_name,
-            modalities=["audio", "text"],
-            temperature=0.7,
-            input_audio_transcription=InputAudioTranscription(
-                model="whisper-1",
-                language="sv",  # Swedish language
-                prompt="Svenska konversation med AI-assistent Elsa"
-            )
-        )
+        llm=openai.realtime.RealtimeModel(**_REALTIME_CFG)
     )
 
     # Event handlers for conversation tracking
     @session.on("conversation_item_added")
     def on_conversation_item_added(event: ConversationItemAddedEvent):
+        text = event.item.text_content
         tracker.add_item(
             role=event.item.role,
-            content=event.item.text_content,
+            content=text,
             timestamp=event.created_at
         )
-        logger.info(f"Conversation item from {event.item.role}: {event.item.text_content[:50]}...")
+        # Lazy %-args: %.50s truncates at format time; whole block skipped when INFO is off
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Conversation item from %s: %.50s...", event.item.role, text)
 
     @session.on("user_input_transcribed")
     def on_user_input_transcribed(event: UserInputTranscribedEvent):
-        if event.is_final:
-            logger.info(f"Final user transcript: {event.transcript}")
+        if event.is_final and logger.isEnabledFor(logging.INFO):
+            logger.info("Final user transcript: %s", event.transcript)
             # Remove automatic word detection - let agent decide via function tools
 
-    # Register webhook as shutdown callback
+    # Register webhook as shutdown callback (only when a webhook URL is configured)
     async def send_completion_webhook():
         logger.info("Sending completion webhook...")
         await send_webhook(tracker)
 
-    ctx.add_shutdown_callback(send_completion_webhook)
+    if _WEBHOOK_URL:
+        ctx.add_shutdown_callback(send_completion_webhook)
+    else:
+        logger.info("No webhook URL configured, skipping webhook")
 
     # Event-driven greeting: trigger when participant joins (optimal latency)
     @ctx.room.on("participant_connected")
@@ -224,9 +267,8 @@ async def entrypoint(ctx: JobContext):
 
         # Trigger immediate Swedish greeting using gpt-realtime
         async def deliver_greeting():
-            greeting_message = os.getenv("AGENT_GREETING_MESSAGE", "Hej och välkommen! Jag är Elsa, din AI-assistent. Vad kan jag hjälpa dig med idag?")
             await session.generate_reply(
-                instructions=f"Säg hälsningen på svenska: '{greeting_message}' och vänta på svar."
+                instructions=_GREETING_INSTRUCTIONS
             )
             logger.info("✅ Swedish greeting delivered immediately")
 
@@ -246,9 +288,8 @@ async def entrypoint(ctx: JobContext):
     # ⚠️ CORE FUNCTIONALITY: Swedish greeting delivery - DO NOT MODIFY ⚠️
     # Official LiveKit 2025 phone assistant pattern for gpt-realtime model
     # Tested working: Immediate Swedish greeting without cutoff
-    greeting_message = os.getenv("AGENT_GREETING_MESSAGE", "Hej och välkommen! Jag är Elsa, din AI-assistent. Vad kan jag hjälpa dig med idag?")
     asyncio.create_task(session.generate_reply(
-        instructions=f"Säg hälsningen på svenska: '{greeting_message}' och vänta på svar."
+        instructions=_GREETING_INSTRUCTIONS
     ))
 
 